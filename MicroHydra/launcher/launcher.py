@@ -1,5 +1,5 @@
 from machine import Pin, SDCard, SPI, RTC, ADC
-import time, os, math, ntptime, network
+import time, os, math, ntptime, network, gc
 from lib import keyboard, beeper
 import machine
 from lib import st7789py as st7789
@@ -49,6 +49,24 @@ display_height = const(135)
 max_wifi_attemps = const(1000)
 max_ntp_attemps = const(10)
 
+idle_sleep_ms = const(16)
+
+# the entry type os.ilistdir reports for regular files (directories are 0x4000)
+regular_file_type = const(0x8000)
+
+# x coordinates for the centered "On"/"Off" UI Sound text
+on_text_x = const(104)
+off_text_x = const(96)
+
+# UI sounds, with their note frequencies looked up ahead of time
+startup_beep = beeper.Beeper.compile(('C3', 'F3', 'A3', ('F3','A3','C3'), ('F3','A3','C3')))
+right_beep = beeper.Beeper.compile((("C5","D4"),"A4"))
+left_beep = beeper.Beeper.compile((("B3","C5"),"A4"))
+unmute_beep = beeper.Beeper.compile(("C4","G4","G4"))
+reload_beep = beeper.Beeper.compile(('F3','A3','C3'))
+launch_beep = beeper.Beeper.compile(('C4','B4','C5','C5'))
+jump_beep = beeper.Beeper.compile("G3")
+
 
 
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -58,14 +76,38 @@ max_ntp_attemps = const(10)
 
 
 
+def find_apps(directory):
+    """
+    Return a dict of {app name: app path} for each .py or .mpy file in a directory.
+    If an app has both a .py and a compiled .mpy version, the .mpy is used.
+    """
+    apps = {}
+    # ilistdir gives us (name, type, inode, ...) one at a time, so we can skip subdirectories without building a list
+    for entry in os.ilistdir(directory):
+        if entry[1] != regular_file_type:
+            continue
+        name, dot, extension = entry[0].rpartition(".")
+        # files without any extension (like one just named "py") aren't apps
+        if not dot:
+            continue
+        if extension == "mpy" or (extension == "py" and name not in apps):
+            apps[name] = directory + "/" + entry[0]
+    return apps
+
+
+
+# set once mounting the sd card has failed, so that reloading the apps doesn't probe for a missing card again
+sd_mount_failed = False
+
 def scan_apps(sd):
+    global sd_mount_failed
     # first we need a list of apps located on the flash or SDCard
 
     main_directory = os.listdir("/")
     
     
     # if the sd card is not mounted, we need to mount it.
-    if "sd" not in main_directory:
+    if "sd" not in main_directory and not sd_mount_failed:
         try:
             sd = SDCard(slot=2, sck=Pin(40), miso=Pin(39), mosi=Pin(14), cs=Pin(12))
         except OSError as e:
@@ -78,97 +120,70 @@ def scan_apps(sd):
                 
         try:
             os.mount(sd, '/sd')
+            main_directory.append("sd")
         except OSError as e:
             print(e)
             print("Could not mount SDCard.")
+            sd_mount_failed = True
         except NameError as e:
             print(e)
             print("SDCard not mounted")
-            
-        main_directory = os.listdir("/")
 
     sd_directory = []
     if "sd" in main_directory:
         sd_directory = os.listdir("/sd")
 
     # if the apps folder does not exist, create it.
+    # (we already know what these directories contain, so there's no need to list them again afterwards)
     if "apps" not in main_directory:
         os.mkdir("/apps")
-        main_directory = os.listdir("/")
         
     # do the same for the sdcard apps directory
     if "apps" not in sd_directory and "sd" in main_directory:
         os.mkdir("/sd/apps")
-        sd_directory = os.listdir("/sd")
 
 
 
-    # if everything above worked, sdcard should be mounted (if available), and both app directories should exist. now look inside to find our apps:
-    main_app_list = os.listdir("/apps")
-    sd_app_list = []
+    # if everything above worked, sdcard should be mounted (if available), and both app directories should exist. now look inside to find our apps.
+    # if multiple apps share the same name, then we will simply use the app found most recently. 
+    found_paths = find_apps("/apps")
 
     if "sd" in main_directory:
         try:
-            sd_app_list = os.listdir("/sd/apps")
+            found_paths.update(find_apps("/sd/apps"))
         except OSError as e:
             print(e)
             print("SDCard mounted but cant be opened; assuming it's been removed. Unmounting /sd.")
             os.umount('/sd')
-
-
-
-
-    # now lets collect some separate app names and locations
-    app_names = []
-    app_paths = {}
-
-    for entry in main_app_list:
-        if entry.endswith(".py"):
-            this_name = entry[:-3]
-            
-            # the purpose of this check is to prevent dealing with duplicated apps.
-            # if multiple apps share the same name, then we will simply use the app found most recently. 
-            if this_name not in app_names:
-                app_names.append( this_name ) # for pretty display
-            
-            app_paths[f"{this_name}"] = f"/apps/{entry}"
-
-        elif entry.endswith(".mpy"):
-            this_name = entry[:-4]
-            if this_name not in app_names:
-                app_names.append( this_name )
-            app_paths[f"{this_name}"] = f"/apps/{entry}"
-            
-            
-    for entry in sd_app_list:
-        if entry.endswith(".py"): #repeat for sdcard
-            this_name = entry[:-3]
-            
-            if this_name not in app_names:
-                app_names.append( this_name )
-            
-            app_paths[f"{this_name}"] = f"/sd/apps/{entry}"
-            
-        elif entry.endswith(".mpy"):
-            this_name = entry[:-4]
-            if this_name not in app_names:
-                app_names.append( this_name )
-            app_paths[f"{this_name}"] = f"/sd/apps/{entry}"
-            
+    
     #sort alphabetically without uppercase/lowercase discrimination:
-    app_names.sort(key=lambda element: element.lower())
+    app_names = sorted(found_paths, key=str.lower)
+    
+    # app paths are stored in a list parallel to app_names, so they can be looked up by index
+    app_paths = [found_paths[name] for name in app_names]
     
     #add an appname to refresh the app list
     app_names.append("Reload Apps")
+    app_paths.append(None)
     #add an appname to control the beeps
     app_names.append("UI Sound")
+    app_paths.append(None)
     #add an appname to open settings app
     app_names.append("Settings")
-    app_paths["Settings"] = "/launcher/settings.py"
+    app_paths.append("/launcher/settings.py")
     
-
+    # also remember which apps live on the sd card, so we know which icon to draw
+    app_is_sd = [path is not None and path.startswith("/sd") for path in app_paths]
+    
+    # lowercase names are used to jump to an app with the keyboard
+    app_names_lower = [name.lower() for name in app_names]
     
-    return app_names, app_paths, sd
+    # crop long names for display, and work out where each one is drawn (x coordinate, width)
+    display_names = [name if len(name) <= 15 else name[:12] + "..." for name in app_names]
+    # characters are 16px wide, and the display is 240px wide, so centered text starts at 120 - (len * 8)
+    name_geom = [(120 - (len(name) << 3), len(name) << 4) for name in display_names]
+    
+    return app_names, app_names_lower, display_names, name_geom, app_paths, app_is_sd, sd
 
 
 
@@ -196,54 +211,105 @@ def launch_app(app_path):
 
 
 
-def center_text_x(text, char_width = 16):
+def ease_out_cubic(x):
+    return 1 - ((1 - x) ** 3)
+
+# the scroll animation only ever moves 0-119 px from center, so the eased step size for each distance can be precomputed.
+scroll_step_table = bytes(math.floor(ease_out_cubic(i / 120) * 10) + 5 for i in range(120))
+
+@micropython.viper
+def step_scroll_animation(vscsad:int, direction:int) -> int:
     """
-        Calculate the x coordinate to draw a text string, to make it horizontally centered. (plus the text width)
+    Move the scroll animation one step in the given direction, and return the new vscsad.
     """
-    str_width = len(text) * char_width
-    # display is 240 px wide
-    start_coord = 120 - (str_width // 2)
-    
-    return start_coord
+    steps = ptr8(scroll_step_table)
+    offset = vscsad - target_vscsad
+    if offset < 0:
+        offset = -offset
+    if direction == 1:
+        return vscsad + steps[offset]
+    return vscsad - steps[offset]
+
+# returning to center moves 1/8th of the remaining distance each frame. vscsad stays within -80..160, so it's never more than 120px away.
+center_step_table = bytes((i // 8) + 1 for i in range(121))
+
+@micropython.viper
+def step_vscsad(vscsad:int, target:int) -> int:
+    """
+    Move vscsad one step back toward the target (center), and return the new vscsad.
+    """
+    steps = ptr8(center_step_table)
+    if vscsad < target:
+        return vscsad + steps[target - vscsad]
+    return vscsad - steps[vscsad - target]
 
-def ease_out_cubic(x):
-    return 1 - ((1 - x) ** 3)
-        
-        
+
+# lookup tables for converting 24 hour time to 12 hour time
+hour_12_table = tuple((hour % 12) or 12 for hour in range(24))
+ampm_table = ('am',) * 12 + ('pm',) * 12
 
 def time_24_to_12(hour_24,minute):
-    ampm = 'am'
-    if hour_24 >= 12:
-        ampm = 'pm'
-        
-    hour_12 = hour_24 % 12
-    if hour_12 == 0:
-        hour_12 = 12
-        
-    time_string = f"{hour_12}:{'{:02d}'.format(minute)}"
-    return time_string, ampm
+    time_string = "%d:%02d" % (hour_12_table[hour_24], minute)
+    return time_string, ampm_table[hour_24]
 
 
+# adc thresholds for each battery level.
+# more real-world data is needed to dial in battery level.
+# the original values were low, so they will be adjusted based on feedback.
+batt_level_1 = const(1575000) #3.15v (originally 525000 / 1.05v)
+batt_level_2 = const(1750000) #3.5v (originally 1050000 / 2.1v)
+batt_level_3 = const(1925000) #3.85v (originally 1575000 / 3.15v)
+# full charge is 2100000 (4.2v)
+
 def read_battery_level(adc):
     """
     read approx battery level on the adc and return as int range 0 (low) to 3 (high)
     """
     raw_value = adc.read_uv() # vbat has a voltage divider of 1/2
     
-    # more real-world data is needed to dial in battery level.
-    # the original values were low, so they will be adjusted based on feedback.
+    # count the thresholds we are above
+    return (raw_value >= batt_level_1) + (raw_value >= batt_level_2) + (raw_value >= batt_level_3)
+
+
+
+def wifi_sync_rtc(nic, rtc, config):
+    """
+    Wait for wifi to connect, then sync the RTC using NTP, then shut off wifi.
+    
+    This is a generator which does one step of the work each time it is advanced,
+    so that the main loop can keep running while we wait on the network.
+    """
+    sync_ntp_attemps = 0
+    connect_wifi_attemps = 0
+    
+    while True:
+        if nic.isconnected():
+            try:
+                ntptime.settime()
+            except OSError:
+                sync_ntp_attemps += 1
+                
+            if rtc.datetime()[0] != 2000:
+                #apply our timezone offset. converting from seconds lets localtime handle rolling over the date
+                year, month, day, hour, minute, second, weekday, _ = time.localtime(time.time() + (config['timezone'] * 3600))
+                rtc.datetime((year, month, day, weekday, hour, minute, second, 0))
+                print(f'RTC successfully synced to {rtc.datetime()} with {sync_ntp_attemps} attemps.')
+                break
+                
+            elif sync_ntp_attemps >= max_ntp_attemps:
+                print(f"Syncing RTC aborted after {sync_ntp_attemps} attemps")
+                break
+            
+        elif connect_wifi_attemps >= max_wifi_attemps:
+            print(f"Connecting to wifi aborted after {connect_wifi_attemps} loops")
+            break
+        else:
+            connect_wifi_attemps += 1
+            
+        yield
     
-    #originally 525000 (1.05v)
-    if raw_value < 1575000: #3.15v
-        return 0
-    #originally 1050000 (2.1v)
-    if raw_value < 1750000: #3.5v
-        return 1
-    #originally 1575000 (3.15v)
-    if raw_value < 1925000: #3.85v
-        return 2
-    # 2100000 (4.2v)
-    return 3 # 4.2v or higher
+    nic.disconnect()
+    nic.active(False) #shut off wifi
 
 
 
@@ -259,6 +325,7 @@ def read_battery_level(adc):
 
 
 
+@micropython.native
 def main_loop():
     
     #bump up our clock speed so the UI feels smoother (240mhz is the max officially supported, but the default is 160mhz)
@@ -267,11 +334,19 @@ def main_loop():
     
     # load our config asap to support other processes
     config = Config()
+
+    # these values are used constantly while drawing, so keep them in locals instead of doing a dict lookup each time
+    bg_color = config['bg_color']
+    ui_color = config['ui_color']
+    ui_sound = config['ui_sound']
+    volume = config['volume']
+    icon_palette = (bg_color, ui_color)
+    palette = config.palette
+    battery_palette = (palette[2], palette[4])
+    battery_empty_palette = (palette[2], config.extended_colors[0])
         
     # sync our RTC on boot, if set in settings
     syncing_clock = config['sync_clock']
-    sync_ntp_attemps = 0
-    connect_wifi_attemps = 0
     rtc = machine.RTC()
     
     #wifi loves to give unknown runtime errors, just try it twice:
@@ -300,13 +375,27 @@ def main_loop():
                 nic.connect(config['wifi_ssid'], config['wifi_pass'])
             except OSError as e:
                 print("wifi_sync_rtc had this error when connecting:",e)
+        # the rest of the syncing happens a step at a time from the main loop
+        rtc_sync = wifi_sync_rtc(nic, rtc, config)
     
     #before anything else, we should scan for apps
     sd = None #dummy var for when we cant mount SDCard
-    app_names, app_paths, sd = scan_apps(sd)
+    app_names, app_names_lower, display_names, name_geom, app_paths, app_is_sd, sd = scan_apps(sd)
     app_selector_index = 0
-    prev_selector_index = 0
     
+    # scanning creates a lot of short-lived garbage. Clear it out now, before we create our long-lived objects,
+    # so that they get packed together instead of being scattered between the holes left behind.
+    gc.collect()
+    # from here on, have the gc run automatically after a fixed amount of allocation (the threshold suggested by the MicroPython docs).
+    # this keeps collections small and regular, rather than waiting until an allocation fails.
+    gc.threshold(gc.mem_free() // 4 + gc.mem_alloc())
+    
+    #app names are rendered into this buffer, so they can be drawn with a single blit.
+    #it's the biggest buffer we use (a full display width of our big font), so it goes first
+    text_sprite_buffer = bytearray(display_width * 32 * 2)
+    
+    #init the beeper!
+    beep = beeper.Beeper()
     
     #init the keyboard
     kb = keyboard.KeyBoard()
@@ -335,32 +424,35 @@ def main_loop():
     
     nonscroll_elements_displayed = False
     
-    force_redraw_display = True
+    # the time (in minutes since midnight) that formatted_time was last generated for
+    clock_minute_drawn = -1
+    formatted_time, ampm = '', ''
+    battlevel = 0
+    clock_checked_ms = time.ticks_ms()
     
-    #this is used as a flag to tell a future loop to redraw the frame mid-scroll animation
-    delayed_redraw = False
+    # the app selector index that the app name and icon were last drawn for.
+    # these are set to -1 whenever that part of the display needs to be redrawn.
+    text_drawn_index = -1
+    icon_drawn_index = -1
+    # the (cropped) app name currently on the display
+    text_drawn = ""
     
     current_vscsad = 40
     
     scroll_direction = 0 #1 for right, -1 for left, 0 for center
-    refresh_timer = 0
-    
-    #init the beeper!
-    beep = beeper.Beeper()
+
+    # True while we are running at a reduced clock speed, waiting for input
+    idle = False
     
     #starupp sound
-    if config['ui_sound']:
-        beep.play(('C3',
-                   ('F3'),
-                   ('A3'),
-                   ('F3','A3','C3'),
-                   ('F3','A3','C3')),130,config['volume'])
+    if ui_sound:
+        beep.play_compiled(startup_beep, 130, volume)
         
         
     #init diplsay
-    tft.fill_rect(-40,0,280, display_height, config['bg_color'])
-    tft.fill_rect(-40,0,280, 18, config.palette[2])
-    tft.hline(-40,18,280,config.palette[0])
+    tft.fill_rect(-40,0,280, display_height, bg_color)
+    tft.fill_rect(-40,0,280, 18, palette[2])
+    tft.hline(-40,18,280,palette[0])
     
     while True:
         
@@ -368,21 +460,31 @@ def main_loop():
         # ----------------------- check for key presses on the keyboard. Only if they weren't already pressed. --------------------------
         new_keys = kb.get_new_keys()
         if new_keys:
+            # wake up before handling the keypress, so sounds, app scans, and the scroll all run at full speed
+            if idle:
+                machine.freq(240_000_000)
+                idle = False
             
             # ~~~~~~ check if the arrow keys are newly pressed ~~~~~
             if "/" in new_keys: # right arrow
                 app_selector_index += 1
+                #wrap around to the first app
+                if app_selector_index >= len(app_names):
+                    app_selector_index = 0
                 
                 #animation:
 
                 scroll_direction = 1
                 current_vscsad = target_vscsad
-                if config['ui_sound']:
-                    beep.play((("C5","D4"),"A4"), 80, config['volume'])
+                if ui_sound:
+                    beep.play_compiled(right_beep, 80, volume)
 
                 
             elif "," in new_keys: # left arrow
                 app_selector_index -= 1
+                #wrap around to the last app
+                if app_selector_index < 0:
+                    app_selector_index = len(app_names) - 1
                 
                 #animation:
                 
@@ -391,8 +493,8 @@ def main_loop():
                 #this prevents multiple scrolls from messing up the animation
                 current_vscsad = target_vscsad
                 
-                if config['ui_sound']:
-                    beep.play((("B3","C5"),"A4"), 80, config['volume'])
+                if ui_sound:
+                    beep.play_compiled(left_beep, 80, volume)
                 
             
         
@@ -402,21 +504,24 @@ def main_loop():
                 # special "settings" app options will have their own behaviour, otherwise launch the app
                 if app_names[app_selector_index] == "UI Sound":
                     
-                    if config['ui_sound'] == 0: # currently muted, then unmute
-                        config['ui_sound'] = True
-                        force_redraw_display = True
-                        beep.play(("C4","G4","G4"), 100, config['volume'])
+                    if ui_sound == 0: # currently muted, then unmute
+                        ui_sound = True
+                        beep.play_compiled(unmute_beep, 100, volume)
                         
                     else: # currently unmuted, then mute
-                        config['ui_sound'] = False
-                        force_redraw_display = True
+                        ui_sound = False
+                    config['ui_sound'] = ui_sound
+                    # only the "On"/"Off" text needs to change
+                    icon_drawn_index = -1
                 
                 elif app_names[app_selector_index] == "Reload Apps":
-                    app_names, app_paths, sd = scan_apps(sd)
+                    app_names, app_names_lower, display_names, name_geom, app_paths, app_is_sd, sd = scan_apps(sd)
                     app_selector_index = 0
+                    text_drawn_index = -1
+                    icon_drawn_index = -1
                     current_vscsad = 42 # forces scroll animation triggers
-                    if config['ui_sound']:
-                        beep.play(('F3','A3','C3'),100,config['volume'])
+                    if ui_sound:
+                        beep.play_compiled(reload_beep, 100, volume)
                         
                 else: # ~~~~~~~~~~~~~~~~~~~ LAUNCH THE APP! ~~~~~~~~~~~~~~~~~~~~
                     
@@ -435,10 +540,10 @@ def main_loop():
                         except:
                             print("Tried to deinit SDCard, but failed.")
                             
-                    if config['ui_sound']:
-                        beep.play(('C4','B4','C5','C5'),100,config['volume'])
+                    if ui_sound:
+                        beep.play_compiled(launch_beep, 100, volume)
                         
-                    launch_app(app_paths[app_names[app_selector_index]])
+                    launch_app(app_paths[app_selector_index])
 
             else: # keyboard shortcuts!
                 for key in new_keys:
@@ -446,8 +551,8 @@ def main_loop():
                     if len(key) == 1: # filter special keys and repeated presses
                         if key in 'abcdefghijklmnopqrstuvwxyz1234567890':
                             #search for that letter in the app list
-                            for idx, name in enumerate(app_names):
-                                if name.lower().startswith(key):
+                            for idx, name in enumerate(app_names_lower):
+                                if name.startswith(key):
                                     #animation:
                                     if app_selector_index > idx:
                                         scroll_direction = -1
@@ -456,30 +561,33 @@ def main_loop():
                                     current_vscsad = target_vscsad
                                     # go there!
                                     app_selector_index = idx
-                                    if config['ui_sound']:
-                                        beep.play(("G3"), 100, config['volume'])
+                                    if ui_sound:
+                                        beep.play_compiled(jump_beep, 100, volume)
                                     found_key = True
                                     break
 
-        
-        #wrap around our selector index, in case we go over or under the target amount
-        app_selector_index = app_selector_index % len(app_names)
-    
-    
-        time.sleep_ms(4) #this loop runs about 3000 times a second without sleeps. The sleeps actually help things feel smoother.
+
+
+        # when nothing is animating, we are just waiting on the keyboard. Drop the clock speed to save some battery.
+        # (the next keypress bumps it back up, above)
+        if (not idle and scroll_direction == 0 and current_vscsad == target_vscsad
+            and nonscroll_elements_displayed and text_drawn_index == app_selector_index
+            and icon_drawn_index == app_selector_index and not syncing_clock):
+            machine.freq(80_000_000)
+            idle = True
+
+
+        if idle:
+            # we're only waiting on the keyboard, so checking it ~60 times a second is plenty
+            time.sleep_ms(idle_sleep_ms)
+        else:
+            time.sleep_ms(4) #this loop runs about 3000 times a second without sleeps. The sleeps actually help things feel smoother.
         
         
     #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
     #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Main Graphics: ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
     #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
-        #decide now if we will be redrawing the text.
-        # we are capturing this so that we can black out and redraw the screen in two parts
-        if (app_selector_index != prev_selector_index):
-            delayed_redraw = True
-        
-        
-        prev_app_text = app_names[prev_selector_index]
         current_app_text = app_names[app_selector_index]
         
         
@@ -488,13 +596,12 @@ def main_loop():
         # if scrolling animation, move in the direction specified!
         if scroll_direction != 0:
             tft.vscsad(current_vscsad % 240)
+            current_vscsad = step_scroll_animation(current_vscsad, scroll_direction)
             if scroll_direction == 1:
-                current_vscsad += math.floor(ease_out_cubic((current_vscsad - 40) / 120) * 10) + 5
                 if current_vscsad >= 160:
                     current_vscsad = -80
                     scroll_direction = 0
             else:
-                current_vscsad -= math.floor(ease_out_cubic((current_vscsad - 40) / -120) * 10) + 5
                 if current_vscsad <= -80:
                     current_vscsad = 160
                     scroll_direction = 0
@@ -503,135 +610,122 @@ def main_loop():
         # if vscsad/scrolling is not centered, move it toward center!
         if scroll_direction == 0 and current_vscsad != target_vscsad:
             tft.vscsad(current_vscsad % 240)
-            if current_vscsad < target_vscsad:
-
-                current_vscsad += (abs(current_vscsad - target_vscsad) // 8) + 1
-            elif current_vscsad > target_vscsad:
-                current_vscsad -= (abs(current_vscsad - target_vscsad) // 8) + 1
+            current_vscsad = step_vscsad(current_vscsad, target_vscsad)
 
         
         
         # if we are scrolling, we should change some UI elements until we finish
         if nonscroll_elements_displayed and (current_vscsad != target_vscsad):
-            tft.fill_rect(0,132,240,3,config['bg_color']) # erase scrollbar
-            tft.fill_rect(6,2,58,16,config.palette[2]) # erase clock
-            tft.fill_rect(212,4,20,10,config.palette[2]) # erase battery
+            tft.fill_rect(0,132,240,3,bg_color) # erase scrollbar
+            tft.fill_rect(6,2,58,16,palette[2]) # erase clock
+            tft.fill_rect(212,4,20,10,palette[2]) # erase battery
             nonscroll_elements_displayed = False
             
             
         elif nonscroll_elements_displayed == False and (current_vscsad == target_vscsad):
             #scroll bar
             scrollbar_width = 240 // len(app_names)
-            tft.fill_rect((scrollbar_width * app_selector_index),133,scrollbar_width,2,config.palette[2])
-            tft.hline(scrollbar_width * app_selector_index, 132, scrollbar_width, config.palette[0])
+            tft.fill_rect((scrollbar_width * app_selector_index),133,scrollbar_width,2,palette[2])
+            tft.hline(scrollbar_width * app_selector_index, 132, scrollbar_width, palette[0])
             
             #clock
             _,_,_, hour_24, minute, _,_,_ = time.localtime()
-            formatted_time, ampm = time_24_to_12(hour_24, minute)
-            tft.text(fontsmall, formatted_time, 6,2,config.palette[4], config.palette[2])
-            tft.text(fontsmall, ampm, 8 + (len(formatted_time) * 8),1,config.palette[3], config.palette[2])
+            # only reformat the time string if the time has actually changed
+            if (hour_24 * 60) + minute != clock_minute_drawn:
+                clock_minute_drawn = (hour_24 * 60) + minute
+                formatted_time, ampm = time_24_to_12(hour_24, minute)
+                # the battery level changes slowly, so it only needs to be re-read with the clock
+                battlevel = read_battery_level(batt)
+            tft.text(fontsmall, formatted_time, 6,2,palette[4], palette[2])
+            tft.text(fontsmall, ampm, 8 + (len(formatted_time) * 8),1,palette[3], palette[2])
             
             #battery
-            battlevel = read_battery_level(batt)
             if battlevel == 3:
-                tft.bitmap_icons(battery, battery.FULL, (config.palette[2],config.palette[4]),212, 4)
+                tft.bitmap_icons(battery, battery.FULL, battery_palette,212, 4)
             elif battlevel == 2:
-                tft.bitmap_icons(battery, battery.HIGH, (config.palette[2],config.palette[4]),212, 4)
+                tft.bitmap_icons(battery, battery.HIGH, battery_palette,212, 4)
             elif battlevel == 1:
-                tft.bitmap_icons(battery, battery.LOW, (config.palette[2],config.palette[4]),212, 4)
+                tft.bitmap_icons(battery, battery.LOW, battery_palette,212, 4)
             else:
-                tft.bitmap_icons(battery, battery.EMPTY, (config.palette[2],config.extended_colors[0]),212, 4)
+                tft.bitmap_icons(battery, battery.EMPTY, battery_empty_palette,212, 4)
             
             nonscroll_elements_displayed = True
+            clock_checked_ms = time.ticks_ms()
             
+        # while the clock is displayed, check about once per second if the minute has changed.
+        # (the time is only read occasionally, rather than making a new time tuple on every loop)
+        elif nonscroll_elements_displayed and time.ticks_diff(time.ticks_ms(), clock_checked_ms) >= 1000:
+            clock_checked_ms = time.ticks_ms()
+            _,_,_, hour_24, minute, _,_,_ = time.localtime()
+            if (hour_24 * 60) + minute != clock_minute_drawn:
+                # erase the old time, and let the block above redraw the status elements on the next loop
+                tft.fill_rect(6,2,58,16,palette[2])
+                nonscroll_elements_displayed = False
         
-        #refresh the text mid-scroll, or when forced
-        if (delayed_redraw and scroll_direction == 0 ) or force_redraw_display:
-            #delayed_redraw = False
-            refresh_timer += 1
+        # refresh the text once the scroll is finished, but only if what's on the display is out of date.
+        # the text and icon are drawn on separate loops, so that we can black out and redraw the screen in two parts
+        if scroll_direction == 0:
             
-            if refresh_timer == 1 or force_redraw_display: # redraw text
-                #crop text for display
-                if len(prev_app_text) > 15:
-                    prev_app_text = prev_app_text[:12] + "..."
-                if len(current_app_text) > 15:
-                    current_app_text = current_app_text[:12] + "..."
+            if text_drawn_index != app_selector_index: # redraw text
+                current_display_name = display_names[app_selector_index]
+                text_x, text_width = name_geom[app_selector_index]
                 
-                #blackout the old text
-                tft.fill_rect(-40, appname_y, 280, 32, config['bg_color'])
-            
-                #draw new text
-                tft.text(font, current_app_text, center_text_x(current_app_text), appname_y, config['ui_color'], config['bg_color'])
+                if text_drawn_index != -1 and len(text_drawn) == len(current_display_name):
+                    # names of the same length are drawn in the same place, so only the characters that changed need to be drawn
+                    start = 0
+                    end = len(current_display_name)
+                    while start < end and text_drawn[start] == current_display_name[start]:
+                        start += 1
+                    while end > start and text_drawn[end - 1] == current_display_name[end - 1]:
+                        end -= 1
+                    if start < end:
+                        tft.text(font, current_display_name[start:end], text_x + (start << 4), appname_y, ui_color, bg_color)
+                else:
+                    #draw new text, and blackout the old text on either side of it
+                    tft.fill_rect(-40, appname_y, text_x + 40, 32, bg_color)
+                    tft.blit_buffer(tft.text_sprite(font, current_display_name, text_sprite_buffer, ui_color, bg_color), text_x, appname_y, text_width, 32)
+                    tft.fill_rect(text_x + text_width, appname_y, 240 - (text_x + text_width), 32, bg_color)
+                
+                text_drawn_index = app_selector_index
+                text_drawn = current_display_name
             
-            if refresh_timer == 2 or force_redraw_display: # redraw icon
-                refresh_timer = 0
-                delayed_redraw = False
+            elif icon_drawn_index != app_selector_index: # redraw icon
+                icon_drawn_index = app_selector_index
                 
                 #blackout old icon
-                tft.fill_rect(96, 30, 48, 36, config['bg_color'])
+                tft.fill_rect(96, 30, 48, 36, bg_color)
                 
                 #special menu options for settings
                 if current_app_text == "UI Sound":
-                    if config['ui_sound']:
-                        tft.text(font, "On", center_text_x("On"), 36, config['ui_color'], config['bg_color'])
+                    if ui_sound:
+                        tft.text(font, "On", on_text_x, 36, ui_color, bg_color)
                     else:
-                        tft.text(font, "Off", center_text_x("Off"), 36, config.palette[3], config['bg_color'])
+                        tft.text(font, "Off", off_text_x, 36, palette[3], bg_color)
                         
                 elif current_app_text == "Reload Apps":
-                    tft.bitmap_icons(icons, icons.RELOAD, (config['bg_color'],config['ui_color']),104, 36)
+                    tft.bitmap_icons(icons, icons.RELOAD, icon_palette,104, 36)
                     
                 elif current_app_text == "Settings":
-                    tft.bitmap_icons(icons, icons.GEAR, (config['bg_color'],config['ui_color']),104, 36)
+                    tft.bitmap_icons(icons, icons.GEAR, icon_palette,104, 36)
                     
-                elif app_paths[app_names[app_selector_index]][:3] == "/sd":
-                    tft.bitmap_icons(icons, icons.SDCARD, (config['bg_color'],config['ui_color']),104, 36)
+                elif app_is_sd[app_selector_index]:
+                    tft.bitmap_icons(icons, icons.SDCARD, icon_palette,104, 36)
                 else:
-                    tft.bitmap_icons(icons, icons.FLASH, (config['bg_color'],config['ui_color']),104, 36)
+                    tft.bitmap_icons(icons, icons.FLASH, icon_palette,104, 36)
             
 
         
             
-        
-        #reset vars for next loop
-        force_redraw_display = False
-        
-        #update prev app selector index to current one for next cycle
-        prev_selector_index = app_selector_index
             
         #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
         #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ WIFI and RTC: ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
         #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
         
         if syncing_clock:
-            if nic.isconnected():
-                try:
-                    ntptime.settime()
-                except OSError:
-                    sync_ntp_attemps += 1
-                    
-                if rtc.datetime()[0] != 2000:
-                    nic.disconnect()
-                    nic.active(False) #shut off wifi
-                    syncing_clock = False
-                    #apply our timezone offset
-                    time_list = list(rtc.datetime())
-                    time_list[4] = time_list[4] + config['timezone']
-                    rtc.datetime(tuple(time_list))
-                    print(f'RTC successfully synced to {rtc.datetime()} with {sync_ntp_attemps} attemps.')
-                    
-                elif sync_ntp_attemps >= max_ntp_attemps:
-                    nic.disconnect()
-                    nic.active(False) #shut off wifi
-                    syncing_clock = False
-                    print(f"Syncing RTC aborted after {sync_ntp_attemps} attemps")
-                
-            elif connect_wifi_attemps >= max_wifi_attemps:
-                nic.disconnect()
-                nic.active(False) #shut off wifi
+            try:
+                next(rtc_sync)
+            except StopIteration:
                 syncing_clock = False
-                print(f"Connecting to wifi aborted after {connect_wifi_attemps} loops")
-            else:
-                connect_wifi_attemps += 1
         
 # run the main loop!
 main_loop()
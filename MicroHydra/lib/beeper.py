@@ -392,6 +392,38 @@ class Beeper:
                     self.play_triple(tone_map[note[0]],tone_map[note[1]], tone_map[note[2]], time_ms, volume)
     
     
+    @staticmethod
+    def compile(notes):
+        """
+        Look up the frequencies for some notes ahead of time, for use with self.play_compiled.
+        "notes" takes the same forms as in self.play.
+        Returns a tuple with a tuple of frequencies for each note (or chord) to play.
+        """
+        if type(notes) == str:
+            notes = (notes,)
+        compiled = []
+        for note in notes:
+            if type(note) == str:
+                compiled.append((tone_map[note],))
+            else:
+                compiled.append(tuple(tone_map[name] for name in note[:3]))
+        return tuple(compiled)
+    
+    
+    def play_compiled(self, compiled, time_ms=100, volume=4):
+        """
+        Play notes that were prepared with Beeper.compile.
+        This works like self.play, but skips looking up each note name every time it's played.
+        """
+        for freqs in compiled:
+            if len(freqs) == 1:
+                self.play_freq(freqs[0], time_ms, volume)
+            elif len(freqs) == 2:
+                self.play_double(freqs[0], freqs[1], time_ms, volume)
+            else:
+                self.play_triple(freqs[0], freqs[1], freqs[2], time_ms, volume)
+    
+    
 if __name__ == "__main__":
     import time
     beep = Beeper()
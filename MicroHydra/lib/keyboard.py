@@ -3,8 +3,9 @@ from machine import Pin
 
 
 """
-lib.keyboard version: 1.1
+lib.keyboard version: 1.2
 changes:
+    get_new_keys() returns early when no keys are held.
     Cleaned unused code.
     Added KeyBoard.get_new_keys()
 """
@@ -145,6 +146,9 @@ class KeyBoard():
         """
         self.prev_key_state = self.key_state
         self.get_pressed_keys()
+        # usually nothing is held at all, and then there can't be any new keys either.
+        if not self.key_state:
+            return self.key_state
         # Originally I wanted to use a set() for this, but with testing, this is apparantly faster. 
         return [key for key in self.key_state if key not in self.prev_key_state]
         
@@ -301,6 +301,11 @@ class ST7789:
         self._rotation = rotation % 4
         self.color_order = color_order
         self.init_cmds = custom_init or _ST7789_INIT_CMDS
+        # the last pixel pattern used by fill_rect, kept so it can be reused
+        self._fill_pixel = None
+        self._fill_buffer = None
+        # pixel buffer for bitmap_icons. It grows to fit the largest icon drawn, and smaller icons use the start of it.
+        self._icon_buffer = bytearray(0)
         self.hard_reset()
         # yes, twice, once is not always enough
         self.init(self.init_cmds)
@@ -530,13 +535,22 @@ class ST7789:
         pixel = struct.pack(
             _ENCODE_PIXEL_SWAPPED if self.needs_swap else _ENCODE_PIXEL, color
         )
+        # send every chunk in one transaction, rather than toggling cs for each chunk
+        if self.cs:
+            self.cs.off()
         self.dc.on()
         if chunks:
-            data = pixel * _BUFFER_SIZE
+            # reuse the pattern from the last fill if the color hasn't changed
+            if pixel != self._fill_pixel:
+                self._fill_pixel = pixel
+                self._fill_buffer = pixel * _BUFFER_SIZE
+            data = self._fill_buffer
             for _ in range(chunks):
-                self._write(None, data)
+                self.spi.write(data)
         if rest:
-            self._write(None, pixel * rest)
+            self.spi.write(pixel * rest)
+        if self.cs:
+            self.cs.on()
 
     def fill(self, color):
         """
@@ -777,6 +791,93 @@ class ST7789:
         else:
             self._text16(font, text, x0, y0, fg_color, bg_color)
 
+    def text_sprite(self, font, text, buffer, color=WHITE, background=BLACK):
+        """
+        Render text into the given buffer, so it can be drawn later using blit_buffer.
+        Drawing a prepared sprite takes one SPI transfer, rather than several per character.
+        Only 16 bit wide fonts are supported.
+
+        Args:
+            font (module): font module to use.
+            text (str): text to render
+            buffer (bytearray): buffer to render into. Must hold at least len(text) * 32 * font.HEIGHT bytes.
+            color (int): 565 encoded color to use for characters
+            background (int): 565 encoded color to use for background
+
+        Returns:
+            memoryview: the used part of buffer; (len(text) * 16) x font.HEIGHT pixels, in color565 format
+        """
+        fg_color = color if self.needs_swap else ((color << 8) & 0xFF00) | (color >> 8)
+        bg_color = (
+            background
+            if self.needs_swap
+            else ((background << 8) & 0xFF00) | (background >> 8)
+        )
+
+        row_pixels = len(text) * 16
+        sprite_len = row_pixels * 2 * font.HEIGHT
+        if len(buffer) < sprite_len:
+            raise ValueError("buffer is too small for text")
+        sprite = memoryview(buffer)[:sprite_len]
+
+        colors = (fg_color << 16) | bg_color
+        glyphs = memoryview(font.FONT)
+        glyph_len = font.HEIGHT * 2
+
+        for col, char in enumerate(text):
+            ch = ord(char)
+            if not font.FIRST <= ch < font.LAST:
+                ch = 32 # draw unsupported characters as a space
+
+            idx = (ch - font.FIRST) * glyph_len
+            self._pack16_sprite(glyphs[idx:idx + glyph_len], sprite[col * 32:], colors, row_pixels)
+
+        return sprite
+
+    @micropython.viper
+    @staticmethod
+    def _pack16_sprite(glyph, sprite, colors: uint, row_pixels: uint):
+        """
+        Pack a 16 pixel wide character straight into a (wider) sprite buffer.
+
+        Args:
+            glyph: the character's font data, 2 bytes per row
+            sprite: the sprite buffer, starting at the character's top left pixel
+            colors (uint): 565 encoded colors, (fg_color << 16) | bg_color
+            row_pixels (uint): width of the whole sprite, in pixels
+        """
+        fg_color = colors >> 16
+        bg_color = colors & 0xFFFF
+        source = ptr8(glyph)
+        bitmap = ptr16(sprite)
+        end = uint(len(glyph))
+        idx = uint(0)
+        i = uint(0)
+
+        while idx < end:
+            byte = source[idx]
+            bitmap[i] = fg_color if byte & _BIT7 else bg_color
+            bitmap[i + 1] = fg_color if byte & _BIT6 else bg_color
+            bitmap[i + 2] = fg_color if byte & _BIT5 else bg_color
+            bitmap[i + 3] = fg_color if byte & _BIT4 else bg_color
+            bitmap[i + 4] = fg_color if byte & _BIT3 else bg_color
+            bitmap[i + 5] = fg_color if byte & _BIT2 else bg_color
+            bitmap[i + 6] = fg_color if byte & _BIT1 else bg_color
+            bitmap[i + 7] = fg_color if byte & _BIT0 else bg_color
+
+            byte = source[idx + 1]
+            bitmap[i + 8] = fg_color if byte & _BIT7 else bg_color
+            bitmap[i + 9] = fg_color if byte & _BIT6 else bg_color
+            bitmap[i + 10] = fg_color if byte & _BIT5 else bg_color
+            bitmap[i + 11] = fg_color if byte & _BIT4 else bg_color
+            bitmap[i + 12] = fg_color if byte & _BIT3 else bg_color
+            bitmap[i + 13] = fg_color if byte & _BIT2 else bg_color
+            bitmap[i + 14] = fg_color if byte & _BIT1 else bg_color
+            bitmap[i + 15] = fg_color if byte & _BIT0 else bg_color
+
+            idx += 2
+            i += row_pixels
+
     def bitmap(self, bitmap, x, y, index=0):
         """
         Draw a bitmap on display at the specified column and row
@@ -847,7 +948,10 @@ class ST7789:
         bpp = bitmap_module.BPP
         bs_bit = 0
         needs_swap = self.needs_swap
-        buffer = bytearray(buffer_len)
+        # every byte we send gets overwritten below, so the buffer from the last icon can be reused as-is
+        if len(self._icon_buffer) < buffer_len:
+            self._icon_buffer = bytearray(buffer_len)
+        buffer = self._icon_buffer
 
         for i in range(0, buffer_len, 2):
             color_index = 0
@@ -866,7 +970,7 @@ class ST7789:
                 buffer[i + 1] = color & 0xFF
 
         self._set_window(x, y, to_col, to_row)
-        self._write(None, buffer)
+        self._write(None, memoryview(buffer)[:buffer_len])
 
     def pbitmap(self, bitmap, x, y, index=0):
         """